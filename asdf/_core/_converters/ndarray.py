@@ -1,4 +1,8 @@
+import sys
+import weakref
+
 import numpy as np
+from numpy import ma
 
 from asdf.extension import Converter
 
@@ -16,9 +20,6 @@ class NDArrayConverter(Converter):
     ]
 
     def to_yaml_tree(self, obj, tag, ctx):
-        import numpy as np
-        from numpy import ma
-
         from asdf import config, util
         from asdf._block.options import Options
         from asdf.tags.core.ndarray import NDArrayType, numpy_array_to_list, numpy_dtype_to_asdf_datatype
@@ -42,16 +43,19 @@ class NDArrayConverter(Converter):
         # The ndarray-1.0.0 schema does not permit 0 valued strides.
         # Perhaps we'll want to allow this someday, to efficiently
         # represent an array of all the same value.
-        if any(stride == 0 for stride in data.strides):
+        if 0 in data.strides:
             data = np.ascontiguousarray(data)
 
         # The view computations that follow assume that the base array
         # is contiguous.  If not, we need to make a copy to avoid
         # writing a nonsense view.
         base = util.get_array_base(data)
-        if not base.flags.forc:
+        base_flags = base.flags
+        if not (base_flags.c_contiguous or base_flags.f_contiguous):
             data = np.ascontiguousarray(data)
-            base = util.get_array_base(data)
+            # a copy owns its data and is its own base, only walk
+            # the base chain if no copy was needed
+            base = data if data.base is None else util.get_array_base(data)
 
         shape = data.shape
 
@@ -102,9 +106,7 @@ class NDArrayConverter(Converter):
             result["datatype"] = dtype
 
         else:
-            result["shape"] = list(shape)
             if options.storage_type == "streamed":
-                result["shape"][0] = "*"
                 result["source"] = -1
                 ctx._blocks.set_streamed_write_block(base, data)
             else:
@@ -118,68 +120,125 @@ class NDArrayConverter(Converter):
             if strides is not None:
                 result["strides"] = list(strides)
 
-        if isinstance(data, ma.MaskedArray) and np.any(data.mask):
-            if options.storage_type == "inline":
-                ctx._blocks._set_array_storage(data.mask, "inline")
+        if isinstance(data, ma.MaskedArray):
+            mask = data.mask
+            if mask.dtype.names is not None:
+                # np.any does not support structured dtypes, for these
+                # (all boolean) masks check the underlying bytes
+                has_mask = np.ascontiguousarray(mask).view(np.uint8).any()
+            else:
+                has_mask = np.any(mask)
+
+            if has_mask:
+                if options.storage_type == "inline":
+                    ctx._blocks._set_array_storage(mask, "inline")
 
-            result["mask"] = data.mask
+                result["mask"] = mask
 
         return result
 
     def from_yaml_tree(self, node, tag, ctx):
-        import sys
-        import weakref
+        handler = _lookup_handler(self._node_handlers, node)
+        if handler is None:
+            msg = "Invalid ndarray description."
+            raise TypeError(msg)
+        return handler(self, node, ctx)
 
+    def _from_list(self, node, ctx):
         from asdf.tags.core import NDArrayType
+
+        instance = NDArrayType(node, None, None, None, None, None, None)
+        ctx._blocks._set_array_storage(instance, "inline")
+        return instance
+
+    def _from_dict(self, node, ctx):
         from asdf.tags.core.ndarray import asdf_datatype_to_numpy_dtype
 
-        if isinstance(node, list):
-            instance = NDArrayType(node, None, None, None, None, None, None)
-            ctx._blocks._set_array_storage(instance, "inline")
-            return instance
-
-        if isinstance(node, dict):
-            shape = node.get("shape", None)
-            if "source" in node and "data" in node:
-                msg = "Both source and data may not be provided at the same time"
-                raise ValueError(msg)
-            if "source" in node:
-                source = node["source"]
-                byteorder = node["byteorder"]
-            else:
-                source = node["data"]
-                byteorder = sys.byteorder
-            dtype = asdf_datatype_to_numpy_dtype(node["datatype"], byteorder) if "datatype" in node else None
-            offset = node.get("offset", 0)
-            strides = node.get("strides", None)
-            mask = node.get("mask", None)
-
-            if isinstance(source, int):
-                # internal block
-                data_callback = ctx.get_block_data_callback(source)
-                instance = NDArrayType(source, shape, dtype, offset, strides, "A", mask, data_callback)
-            elif isinstance(source, str):
-                # external
-                def data_callback(_attr=None, _ref=weakref.ref(ctx._blocks)):
-                    if _attr not in (None, "cached_data", "data"):
-                        raise AttributeError(f"_attr {_attr} is not supported")
-                    blks = _ref()
-                    if blks is None:
-                        msg = "Failed to resolve reference to AsdfFile to read external block"
-                        raise OSError(msg)
-                    array = blks._load_external(source)
-                    blks._set_array_storage(array, "external")
-                    return array
-
-                instance = NDArrayType(source, shape, dtype, offset, strides, "A", mask, data_callback)
-            else:
-                # inline
-                instance = NDArrayType(source, shape, dtype, offset, strides, "A", mask)
-                ctx._blocks._set_array_storage(instance, "inline")
+        shape = node.get("shape", None)
+        if "source" in node and "data" in node:
+            msg = "Both source and data may not be provided at the same time"
+            raise ValueError(msg)
+        if "source" in node:
+            source = node["source"]
+            byteorder = node["byteorder"]
+        else:
+            source = node["data"]
+            byteorder = sys.byteorder
+        dtype = asdf_datatype_to_numpy_dtype(node["datatype"], byteorder) if "datatype" in node else None
+        offset = node.get("offset", 0)
+        strides = node.get("strides", None)
+        mask = node.get("mask", None)
+
+        handler = _lookup_handler(self._source_handlers, source) or NDArrayConverter._from_inline_source
+        instance = handler(self, source, shape, dtype, offset, strides, mask, ctx)
+
+        if not ctx._blocks._lazy_load:
+            instance._make_array()
+        return instance
+
+    def _from_internal_source(self, source, shape, dtype, offset, strides, mask, ctx):
+        from asdf.tags.core import NDArrayType
+
+        data_callback = ctx.get_block_data_callback(source)
+        return NDArrayType(source, shape, dtype, offset, strides, "A", mask, data_callback)
+
+    def _from_external_source(self, source, shape, dtype, offset, strides, mask, ctx):
+        from asdf.tags.core import NDArrayType
+
+        data_callback = _ExternalBlockLoader(ctx._blocks, source)
+        return NDArrayType(source, shape, dtype, offset, strides, "A", mask, data_callback)
+
+    def _from_inline_source(self, source, shape, dtype, offset, strides, mask, ctx):
+        from asdf.tags.core import NDArrayType
+
+        instance = NDArrayType(source, shape, dtype, offset, strides, "A", mask)
+        ctx._blocks._set_array_storage(instance, "inline")
+        return instance
+
+    # handlers for from_yaml_tree keyed by the type of the node
+    _node_handlers = {list: _from_list, dict: _from_dict}
+
+    # handlers for dict nodes keyed by the type of the source, an int
+    # source is an internal block, a str source is an external block
+    # and anything else is inline data
+    _source_handlers = {int: _from_internal_source, str: _from_external_source}
+
+
+class _ExternalBlockLoader:
+    """
+    Data callback for an array stored in an external block.
+
+    Only a weak reference to the block manager is kept so the callback
+    does not keep the `asdf.AsdfFile` alive.
+    """
+
+    __slots__ = ("_ref", "_source")
+
+    def __init__(self, blocks, source):
+        self._ref = weakref.ref(blocks)
+        self._source = source
+
+    def __call__(self, _attr=None):
+        if _attr not in (None, "cached_data", "data"):
+            raise AttributeError(f"_attr {_attr} is not supported")
+        blks = self._ref()
+        if blks is None:
+            msg = "Failed to resolve reference to AsdfFile to read external block"
+            raise OSError(msg)
+        array = blks._load_external(self._source)
+        blks._set_array_storage(array, "external")
+        return array
+
+
+def _lookup_handler(handlers, obj):
+    # try the exact type first and only walk the mro for
+    # subclasses (bool, tagged nodes, etc)
+    obj_type = type(obj)
+    if obj_type in handlers:
+        return handlers[obj_type]
 
-            if not ctx._blocks._lazy_load:
-                instance._make_array()
-            return instance
+    for base in obj_type.__mro__[1:]:
+        if base in handlers:
+            return handlers[base]
 
-        msg = "Invalid ndarray description."
-        raise TypeError(msg)
+    return None
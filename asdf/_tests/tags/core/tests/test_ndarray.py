@@ -399,6 +399,27 @@ def test_mask_roundtrip(tmpdir):
         assert len(af._blocks.blocks) == 2
 
 
+@pytest.mark.parametrize("storage", ["internal", "inline"])
+def test_unmasked_structured_masked_array_roundtrip(storage):
+    x = np.array([(1, 2.0), (3, 4.0)], dtype=[("a", "i4"), ("b", "f8")])
+    m = ma.array(x, mask=False)
+    af = asdf.AsdfFile({"masked_array": m})
+    af.set_array_storage(m, storage)
+
+    with roundtrip(af) as af:
+        assert_array_equal(af["masked_array"], x)
+
+
+def test_masked_structured_array_invalid():
+    # the ndarray schema does not allow structured masks
+    x = np.zeros(2, dtype=[("a", "i4"), ("b", "f8")])
+    af = asdf.AsdfFile()
+    af["masked_array"] = ma.array(x, mask=[(False, True), (False, False)])
+
+    with pytest.raises(ValidationError):
+        af.write_to(io.BytesIO())
+
+
 def test_len_roundtrip(tmpdir):
     sequence = np.arange(0, 10, dtype=int)
     tree = {"sequence": sequence}
@@ -474,6 +495,40 @@ arr: !core/ndarray-1.0.0
         assert ff.tree["arr"]["f1"].dtype.char == "H"
 
 
+def test_inline_structured_subarray():
+    content = """
+arr: !core/ndarray-1.0.0
+    datatype: [int16, {datatype: float32, shape: [2]}]
+    data: [[[1, [2, 3]], [4, [5, 6]]],
+           [[7, [8, 9]], [10, [11, 12]]]]"""
+
+    buff = helpers.yaml_to_asdf(content)
+
+    with asdf.open(buff) as ff:
+        assert ff.tree["arr"].shape == (2, 2)
+        assert ff.tree["arr"]["f1"].shape == (2, 2, 2)
+        assert_array_equal(ff.tree["arr"]["f0"], [[1, 4], [7, 10]])
+
+
+def test_inline_structured_broadcast_scalars():
+    # numpy broadcasts scalars into subarray and nested structured fields
+    dtype = np.dtype([("a", int, (2,)), ("b", int)])
+    arr = ndarray.inline_data_asarray([[1, 2], [3, 4]], dtype)
+    assert_array_equal(arr["a"], [[1, 1], [3, 3]])
+    assert_array_equal(arr["b"], [2, 4])
+
+    dtype = np.dtype([("a", int), ("b", [("c", int), ("d", float)])])
+    arr = ndarray.inline_data_asarray([[1, 2]], dtype)
+    assert_array_equal(arr["b"]["c"], [2])
+    assert_array_equal(arr["b"]["d"], [2.0])
+
+
+def test_inline_structured_nested_rows():
+    dtype = np.dtype([("a", int), ("b", [("c", int), ("d", float)])])
+    with pytest.raises(ValueError, match=r"data can not be converted to structured array"):
+        ndarray.inline_data_asarray([1, [2, 3.0]], dtype)
+
+
 def test_simple_table():
     table = np.array(
         [
@@ -1085,3 +1140,43 @@ def test_shape_does_not_load_array(tmp_path):
         assert af["arr"]._array is None
         assert af["arr"].shape == (100,)
         assert af["arr"]._array is None
+
+
+@pytest.mark.parametrize("datatype", ["float64", ["ascii", 4], ["ucs4", 3]])
+@pytest.mark.parametrize("byteorder", ["big", "little"])
+def test_asdf_datatype_to_numpy_dtype_cached(datatype, byteorder):
+    first = ndarray.asdf_datatype_to_numpy_dtype(datatype, byteorder)
+    assert ndarray.asdf_datatype_to_numpy_dtype(datatype, byteorder) is first
+
+
+def test_asdf_datatype_to_numpy_dtype_bool_length():
+    # True == 1 so a cached ["ascii", 1] must not be returned for ["ascii", True]
+    assert ndarray.asdf_datatype_to_numpy_dtype(["ascii", 1]) == np.dtype("S1")
+    with pytest.raises(TypeError):
+        ndarray.asdf_datatype_to_numpy_dtype(["ascii", True])
+
+
+def test_len_does_not_load_array(tmp_path):
+    file_path = tmp_path / "test.asdf"
+    with asdf.AsdfFile() as af:
+        af["arr"] = np.arange(100).reshape(10, 10)
+        af.write_to(file_path)
+
+    with asdf.open(file_path, lazy_load=True) as af:
+        assert len(af["arr"]) == 10
+        assert af["arr"]._array is None
+
+        af["arr"]._make_array()
+        assert len(af["arr"]) == 10
+        assert af["arr"].shape == (10, 10)
+
+
+def test_len_streamed_array():
+    buff = io.BytesIO()
+    with asdf.AsdfFile({"stream": asdf.Stream([2], np.float64)}) as af:
+        af.write_to(buff)
+    buff.write(np.zeros(10, np.float64).tobytes())
+    buff.seek(0)
+
+    with asdf.open(buff, lazy_load=True) as af:
+        assert len(af["stream"]) == 5
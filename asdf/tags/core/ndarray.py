@@ -1,5 +1,7 @@
 import mmap
 import sys
+from functools import lru_cache
+from math import prod
 
 import numpy as np
 from numpy import ma
@@ -27,6 +29,22 @@ _datatype_names = {
 _string_datatype_names = {"ascii": "S", "ucs4": "U"}
 
 
+# Reverse of _datatype_names keyed by numpy (kind, itemsize)
+_numpy_to_asdf_datatype_names = {
+    (np.dtype(numpy_name).kind, np.dtype(numpy_name).itemsize): asdf_name
+    for asdf_name, numpy_name in _datatype_names.items()
+}
+
+
+# Whether a scalar asdf datatype (the first name) can be safely
+# cast to another (the second name)
+_safe_casts = {
+    (from_name, to_name): np.can_cast(from_numpy_name, to_numpy_name, "safe")
+    for from_name, from_numpy_name in _datatype_names.items()
+    for to_name, to_numpy_name in _datatype_names.items()
+}
+
+
 def asdf_byteorder_to_numpy_byteorder(byteorder):
     if byteorder == "big":
         return ">"
@@ -38,14 +56,23 @@ def asdf_byteorder_to_numpy_byteorder(byteorder):
     raise ValueError(msg)
 
 
+@lru_cache(maxsize=256)
+def _scalar_asdf_to_numpy(datatype, byteorder):
+    return np.dtype(asdf_byteorder_to_numpy_byteorder(byteorder) + _datatype_names[datatype])
+
+
+# typed so that a bool length (True == 1) does not share an entry with an int
+@lru_cache(maxsize=256, typed=True)
+def _string_asdf_to_numpy(kind, length, byteorder):
+    return np.dtype(asdf_byteorder_to_numpy_byteorder(byteorder) + _string_datatype_names[kind] + str(length))
+
+
 def asdf_datatype_to_numpy_dtype(datatype, byteorder=None):
     if byteorder is None:
         byteorder = sys.byteorder
 
     if isinstance(datatype, str) and datatype in _datatype_names:
-        datatype = _datatype_names[datatype]
-        byteorder = asdf_byteorder_to_numpy_byteorder(byteorder)
-        return np.dtype(str(byteorder + datatype))
+        return _scalar_asdf_to_numpy(datatype, byteorder)
 
     if (
         isinstance(datatype, list)
@@ -54,11 +81,7 @@ def asdf_datatype_to_numpy_dtype(datatype, byteorder=None):
         and isinstance(datatype[1], int)
         and datatype[0] in _string_datatype_names
     ):
-        length = datatype[1]
-        byteorder = asdf_byteorder_to_numpy_byteorder(byteorder)
-        datatype = str(byteorder) + str(_string_datatype_names[datatype[0]]) + str(length)
-
-        return np.dtype(datatype)
+        return _string_asdf_to_numpy(datatype[0], datatype[1], byteorder)
 
     if isinstance(datatype, dict):
         if "datatype" not in datatype:
@@ -128,18 +151,19 @@ def numpy_dtype_to_asdf_datatype(dtype, include_byteorder=True, override_byteord
     if dtype.subdtype is not None:
         return numpy_dtype_to_asdf_datatype(dtype.subdtype[0], override_byteorder=override_byteorder)
 
-    if dtype.name in _datatype_names:
-        return dtype.name, numpy_byteorder_to_asdf_byteorder(dtype.byteorder, override=override_byteorder)
-
-    if dtype.name == "bool":
-        return "bool8", numpy_byteorder_to_asdf_byteorder(dtype.byteorder, override=override_byteorder)
-
-    if dtype.name.startswith("string") or dtype.name.startswith("bytes"):
+    if dtype.kind == "S":
         return ["ascii", dtype.itemsize], "big"
 
-    if dtype.name.startswith("unicode") or dtype.name.startswith("str"):
+    if dtype.kind == "U":
         return (
-            ["ucs4", int(dtype.itemsize / 4)],
+            ["ucs4", dtype.itemsize // 4],
+            numpy_byteorder_to_asdf_byteorder(dtype.byteorder, override=override_byteorder),
+        )
+
+    key = (dtype.kind, dtype.itemsize)
+    if key in _numpy_to_asdf_datatype_names:
+        return (
+            _numpy_to_asdf_datatype_names[key],
             numpy_byteorder_to_asdf_byteorder(dtype.byteorder, override=override_byteorder),
         )
 
@@ -147,6 +171,32 @@ def numpy_dtype_to_asdf_datatype(dtype, include_byteorder=True, override_byteord
     raise ValueError(msg)
 
 
+def _is_structured_row(line, dtype):
+    """
+    Check if line has the layout of a single element of the structured
+    dtype: one value per field where subarray fields are (at most) nested
+    lists of the field shape. numpy broadcasts scalars into subarray and
+    nested structured fields so those may also be a single value.
+    """
+    if not isinstance(line, list) or len(line) != len(dtype.names):
+        return False
+
+    for value, name in zip(line, dtype.names):
+        depth = 0
+        while isinstance(value, list):
+            depth += 1
+            if not len(value):
+                break
+            value = value[0]
+
+        # nested structured fields are not converted to tuples so only
+        # scalar values are supported for these
+        if depth > len(dtype.fields[name][0].shape):
+            return False
+
+    return True
+
+
 def inline_data_asarray(inline, dtype=None):
     # np.asarray doesn't handle structured arrays unless the innermost
     # elements are tuples.  To do that, we drill down the first
@@ -158,19 +208,14 @@ def inline_data_asarray(inline, dtype=None):
     # object dtypes, but ASDF explicitly excludes those, so we're ok
     # there.
     if dtype is not None and dtype.fields is not None:
-
-        def find_innermost_match(line, depth=0):
+        depth = 0
+        line = inline
+        while not _is_structured_row(line, dtype):
             if not isinstance(line, list) or not len(line):
                 msg = "data can not be converted to structured array"
                 raise ValueError(msg)
-            try:
-                np.asarray(tuple(line), dtype=dtype)
-            except ValueError:
-                return find_innermost_match(line[0], depth + 1)
-            else:
-                return depth
-
-        depth = find_innermost_match(inline)
+            line = line[0]
+            depth += 1
 
         def convert_to_tuples(line, data_depth, depth=0):
             if data_depth == depth:
@@ -182,27 +227,58 @@ def inline_data_asarray(inline, dtype=None):
 
         return np.asarray(inline, dtype=dtype)
 
+    # Check for masked (None) values with a single vectorized comparison
+    # and skip the mask handling below for the (common) unmasked case
+    if dtype is None:
+        # without a dtype any None results in an object array so
+        # only object arrays need to be checked
+        array = np.asarray(inline)
+        if array.dtype != object or not np.equal(array, None).any():
+            return array
+    elif not np.equal(np.asarray(inline, dtype=object), None).any():
+        return np.asarray(inline, dtype=dtype)
+
     def handle_mask(inline):
+        # returns the converted inline data and if any values were masked
         if isinstance(inline, list):
             if None in inline:
                 inline_array = np.asarray(inline)
                 nones = np.equal(inline_array, None)
-                return np.ma.array(np.where(nones, 0, inline), mask=nones)
+                return np.ma.array(np.where(nones, 0, inline), mask=nones), True
 
-            return [handle_mask(x) for x in inline]
+            items = []
+            had_mask = False
+            for x in inline:
+                item, item_had_mask = handle_mask(x)
+                items.append(item)
+                had_mask |= item_had_mask
+            return items, had_mask
 
-        return inline
+        return inline, False
 
-    inline = handle_mask(inline)
-
-    inline = np.ma.asarray(inline, dtype=dtype)
-    if not ma.is_masked(inline):
-        return inline.data
+    inline, had_mask = handle_mask(inline)
+    if not had_mask:
+        return np.asarray(inline, dtype=dtype)
 
-    return inline
+    return np.ma.asarray(inline, dtype=dtype)
 
 
 def numpy_array_to_list(array):
+    if isinstance(array, NDArrayType):
+        array = array._make_array()
+
+    if isinstance(array, np.ndarray):
+        # Convert byte string arrays to unicode string arrays, since YAML
+        # doesn't handle the former.
+        if array.dtype.char == "S":
+            return array.astype("U").tolist()
+
+        # ndarray.tolist already produces nested lists of python scalars
+        if array.dtype.kind in "iufcbU":
+            return array.tolist()
+
+    # structured (and other) arrays need tuples converted to lists and
+    # any nested byte strings decoded
     def tolist(x):
         if isinstance(x, (np.ndarray, NDArrayType)):
             x = x.astype("U").tolist() if x.dtype.char == "S" else x.tolist()
@@ -226,7 +302,31 @@ def numpy_array_to_list(array):
     return ascii_to_unicode(tolist(array))
 
 
+# Attributes that NDArrayType.__getattr__ will not look up on the array:
+# - __array_struct__ needs to be ignored, or unicode arrays end up
+#   getting "double casted" and upsized.  This also reduces the
+#   number of array creations in the general case.
+# - __asdf_traverse__ is checked by AsdfFile.info (with hasattr) which
+#   would otherwise make the array and load the array data. This class
+#   does not support that method
+#   see: https://github.com/asdf-format/asdf/issues/1553
+_UNFORWARDED_ATTRIBUTES = frozenset({"__array_struct__", "__asdf_traverse__"})
+
+
 class NDArrayType:
+    __slots__ = (
+        "_source",
+        "_data_callback",
+        "_array",
+        "_mask",
+        "_shape",
+        "_dtype",
+        "_offset",
+        "_strides",
+        "_order",
+        "__weakref__",
+    )
+
     def __init__(self, source, shape, dtype, offset, strides, order, mask, data_callback=None):
         self._source = source
         self._data_callback = data_callback
@@ -347,9 +447,9 @@ class NDArrayType:
                 msg = "'*' may only be in first entry of shape"
                 raise ValueError(msg)
 
-            stride = strides[0] if strides is not None else np.prod(shape[1:]) * dtype.itemsize
+            stride = strides[0] if strides is not None else prod(shape[1:]) * dtype.itemsize
 
-            missing = int(block_size / stride)
+            missing = block_size // stride
             return [missing] + shape[1:]
 
         msg = f"Invalid shape '{shape}'"
@@ -357,7 +457,7 @@ class NDArrayType:
 
     @property
     def shape(self):
-        if self._shape is None or self._array is not None or "*" in self._shape:
+        if self._shape is None or "*" in self._shape:
             # streamed blocks have a '0' data_size in the header so we
             # need to make the array to get the shape
             return self.__array__().shape
@@ -371,23 +471,13 @@ class NDArrayType:
         return self._make_array().dtype
 
     def __len__(self):
-        if self._array is None:
+        if self._shape is not None and len(self._shape) and self._shape[0] != "*":
             return self._shape[0]
 
         return len(self._make_array())
 
     def __getattr__(self, attr):
-        # We need to ignore __array_struct__, or unicode arrays end up
-        # getting "double casted" and upsized.  This also reduces the
-        # number of array creations in the general case.
-        if attr == "__array_struct__":
-            raise AttributeError
-        # AsdfFile.info will call hasattr(obj, "__asdf_traverse__") which
-        # will trigger this method, making the array, and loading the array
-        # data. Intercept this and raise AttributeError as this class does
-        # not support that method
-        # see: https://github.com/asdf-format/asdf/issues/1553
-        if attr == "__asdf_traverse__":
+        if attr in _UNFORWARDED_ATTRIBUTES:
             raise AttributeError
         return getattr(self._make_array(), attr)
 
@@ -402,93 +492,194 @@ class NDArrayType:
 
             raise
 
+    # The operators below are forwarded to the array. Defining __eq__
+    # in the class body sets __hash__ to None, keep instances hashable.
+    __hash__ = object.__hash__
+
+    def __neg__(self):
+        return self._make_array().__neg__()
+
+    def __pos__(self):
+        return self._make_array().__pos__()
+
+    def __abs__(self):
+        return self._make_array().__abs__()
+
+    def __invert__(self):
+        return self._make_array().__invert__()
+
+    def __complex__(self):
+        return self._make_array().__complex__()
+
+    def __int__(self):
+        return self._make_array().__int__()
+
+    def __float__(self):
+        return self._make_array().__float__()
+
+    def __lt__(self, other):
+        return self._make_array().__lt__(other)
+
+    def __le__(self, other):
+        return self._make_array().__le__(other)
+
+    def __eq__(self, other):
+        return self._make_array().__eq__(other)
+
+    def __ne__(self, other):
+        return self._make_array().__ne__(other)
 
-def _make_operation(name):
-    def operation(self, *args):
-        return getattr(self._make_array(), name)(*args)
-
-    return operation
-
-
-for op in [
-    "__neg__",
-    "__pos__",
-    "__abs__",
-    "__invert__",
-    "__complex__",
-    "__int__",
-    "__long__",
-    "__float__",
-    "__oct__",
-    "__hex__",
-    "__lt__",
-    "__le__",
-    "__eq__",
-    "__ne__",
-    "__gt__",
-    "__ge__",
-    "__cmp__",
-    "__rcmp__",
-    "__add__",
-    "__sub__",
-    "__mul__",
-    "__floordiv__",
-    "__mod__",
-    "__divmod__",
-    "__pow__",
-    "__lshift__",
-    "__rshift__",
-    "__and__",
-    "__xor__",
-    "__or__",
-    "__div__",
-    "__truediv__",
-    "__radd__",
-    "__rsub__",
-    "__rmul__",
-    "__rdiv__",
-    "__rtruediv__",
-    "__rfloordiv__",
-    "__rmod__",
-    "__rdivmod__",
-    "__rpow__",
-    "__rlshift__",
-    "__rrshift__",
-    "__rand__",
-    "__rxor__",
-    "__ror__",
-    "__iadd__",
-    "__isub__",
-    "__imul__",
-    "__idiv__",
-    "__itruediv__",
-    "__ifloordiv__",
-    "__imod__",
-    "__ipow__",
-    "__ilshift__",
-    "__irshift__",
-    "__iand__",
-    "__ixor__",
-    "__ior__",
-    "__getitem__",
-    "__delitem__",
-    "__contains__",
-]:
-    setattr(NDArrayType, op, _make_operation(op))
+    def __gt__(self, other):
+        return self._make_array().__gt__(other)
+
+    def __ge__(self, other):
+        return self._make_array().__ge__(other)
+
+    def __add__(self, other):
+        return self._make_array().__add__(other)
+
+    def __sub__(self, other):
+        return self._make_array().__sub__(other)
+
+    def __mul__(self, other):
+        return self._make_array().__mul__(other)
+
+    def __floordiv__(self, other):
+        return self._make_array().__floordiv__(other)
+
+    def __mod__(self, other):
+        return self._make_array().__mod__(other)
+
+    def __divmod__(self, other):
+        return self._make_array().__divmod__(other)
+
+    def __pow__(self, *args):
+        return self._make_array().__pow__(*args)
+
+    def __lshift__(self, other):
+        return self._make_array().__lshift__(other)
+
+    def __rshift__(self, other):
+        return self._make_array().__rshift__(other)
+
+    def __and__(self, other):
+        return self._make_array().__and__(other)
+
+    def __xor__(self, other):
+        return self._make_array().__xor__(other)
+
+    def __or__(self, other):
+        return self._make_array().__or__(other)
+
+    def __truediv__(self, other):
+        return self._make_array().__truediv__(other)
+
+    def __radd__(self, other):
+        return self._make_array().__radd__(other)
+
+    def __rsub__(self, other):
+        return self._make_array().__rsub__(other)
+
+    def __rmul__(self, other):
+        return self._make_array().__rmul__(other)
+
+    def __rtruediv__(self, other):
+        return self._make_array().__rtruediv__(other)
+
+    def __rfloordiv__(self, other):
+        return self._make_array().__rfloordiv__(other)
+
+    def __rmod__(self, other):
+        return self._make_array().__rmod__(other)
+
+    def __rdivmod__(self, other):
+        return self._make_array().__rdivmod__(other)
+
+    def __rpow__(self, *args):
+        return self._make_array().__rpow__(*args)
+
+    def __rlshift__(self, other):
+        return self._make_array().__rlshift__(other)
+
+    def __rrshift__(self, other):
+        return self._make_array().__rrshift__(other)
+
+    def __rand__(self, other):
+        return self._make_array().__rand__(other)
+
+    def __rxor__(self, other):
+        return self._make_array().__rxor__(other)
+
+    def __ror__(self, other):
+        return self._make_array().__ror__(other)
+
+    def __iadd__(self, other):
+        return self._make_array().__iadd__(other)
+
+    def __isub__(self, other):
+        return self._make_array().__isub__(other)
+
+    def __imul__(self, other):
+        return self._make_array().__imul__(other)
+
+    def __itruediv__(self, other):
+        return self._make_array().__itruediv__(other)
+
+    def __ifloordiv__(self, other):
+        return self._make_array().__ifloordiv__(other)
+
+    def __imod__(self, other):
+        return self._make_array().__imod__(other)
+
+    def __ipow__(self, *args):
+        return self._make_array().__ipow__(*args)
+
+    def __ilshift__(self, other):
+        return self._make_array().__ilshift__(other)
+
+    def __irshift__(self, other):
+        return self._make_array().__irshift__(other)
+
+    def __iand__(self, other):
+        return self._make_array().__iand__(other)
+
+    def __ixor__(self, other):
+        return self._make_array().__ixor__(other)
+
+    def __ior__(self, other):
+        return self._make_array().__ior__(other)
+
+    def __getitem__(self, key):
+        return self._make_array().__getitem__(key)
+
+    def __delitem__(self, key):
+        return self._make_array().__delitem__(key)
+
+    def __contains__(self, value):
+        return self._make_array().__contains__(value)
+
+
+def _ndim_from_list(inline):
+    # count the levels of nested lists without converting to an array
+    ndim = 0
+    while isinstance(inline, list):
+        ndim += 1
+        if not len(inline):
+            break
+        inline = inline[0]
+    return ndim
 
 
 def _get_ndim(instance):
     if isinstance(instance, list):
-        array = inline_data_asarray(instance)
-        return array.ndim
+        return _ndim_from_list(instance)
 
     if isinstance(instance, dict):
         if "shape" in instance:
             return len(instance["shape"])
 
         if "data" in instance:
-            array = inline_data_asarray(instance["data"])
-            return array.ndim
+            return _ndim_from_list(instance["data"])
 
     if isinstance(instance, (np.ndarray, NDArrayType)):
         return len(instance.shape)
@@ -538,6 +729,11 @@ def validate_datatype(validator, datatype, instance, schema):
     if schema.get("exact_datatype", False):
         yield ValidationError(f"Expected datatype '{datatype}', got '{in_datatype}'")
 
+    if isinstance(datatype, str) and isinstance(in_datatype, str) and (in_datatype, datatype) in _safe_casts:
+        if not _safe_casts[(in_datatype, datatype)]:
+            yield ValidationError(f"Can not safely cast from '{in_datatype}' to '{datatype}' ")
+        return
+
     np_datatype = asdf_datatype_to_numpy_dtype(datatype)
     np_in_datatype = asdf_datatype_to_numpy_dtype(in_datatype)
 
@@ -555,6 +751,11 @@ def validate_datatype(validator, datatype, instance, schema):
         if len(np_in_datatype.fields) != len(np_datatype.fields):
             yield ValidationError(f"Mismatch in number of columns: Expected {len(datatype)}, got {len(in_datatype)}")
 
+        # a structured cast is only safe if every field casts safely so
+        # only look for the offending fields if the whole cast is unsafe
+        if np_in_datatype.fields and np.can_cast(np_in_datatype, np_datatype, "safe"):
+            return
+
         for i in range(len(np_datatype.fields)):
             in_type = np_in_datatype[i]
             out_type = np_datatype[i]